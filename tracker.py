@@ -3,21 +3,32 @@
 Steam Presence Monitor
 """
 
+import os
+import re
 import sys
 import json
 import time
+import queue
 import signal
 import logging
 import threading
 import requests
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from dataclasses import dataclass, field, asdict
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from concurrent.futures import ThreadPoolExecutor
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_STEAM64 = re.compile(r'\A[0-9]{17}\Z')
+_STEAM64_BASE = 76561197960265728  # SteamID64 of individual account 0
+
 class Colors:
     RESET = "\033[0m"
     BOLD = "\033[1m"
@@ -37,7 +48,7 @@ class UserState:
     avatar: str = ""
     status: int = 0
     game: Optional[str] = None
-    last_change: float = field(default_factory=time.time)
+    last_change: float = field(default_factory=time.monotonic)
 
 class ConfigurationManager:
     FILE_PATH = "monitor_config.json"
@@ -47,17 +58,19 @@ class ConfigurationManager:
         self.webhook_url: Optional[str] = None
         self.target_users: List[str] = []
         self.interval: int = 30
+        self.max_interval: Optional[int] = None
         self._load()
 
     def _load(self):
         if Path(self.FILE_PATH).exists():
             try:
-                with open(self.FILE_PATH, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(self.FILE_PATH, 'rb') as f:
+                    data = orjson.loads(f.read()) if orjson else json.load(f)
                     self.api_key = data.get("api_key", "")
                     self.webhook_url = data.get("webhook_url")
                     self.target_users = data.get("target_users", [])
                     self.interval = data.get("interval", 30)
+                    self.max_interval = data.get("max_interval")
             except Exception:
                 pass
 
@@ -66,10 +79,32 @@ class ConfigurationManager:
             "api_key": self.api_key,
             "webhook_url": self.webhook_url,
             "target_users": self.target_users,
-            "interval": self.interval
+            "interval": self.interval,
+            "max_interval": self.max_interval
         }
-        with open(self.FILE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        # The file holds the API key, so keep its existing mode (0600 for a new one)
+        try:
+            mode = os.stat(self.FILE_PATH).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o600
+        tmp_path = self.FILE_PATH + ".tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+            os.chmod(tmp_path, mode)
+            with os.fdopen(fd, 'wb') as f:
+                if orjson:
+                    f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+                else:
+                    f.write(json.dumps(data, indent=2).encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.FILE_PATH)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
 
     def validate(self) -> bool:
         return bool(self.api_key and self.target_users)
@@ -78,33 +113,47 @@ class NetworkClient:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.session = requests.Session()
-        retries = Retry(total=5, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
+        retries = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504])
+        self.session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=retries))
+        self._pool = ThreadPoolExecutor(max_workers=4)
+        self._chunk_cache = (None, [])
 
-    def get_summaries(self, steam_ids: List[str]) -> List[Dict]:
+    def get_summaries(self, steam_ids: Sequence[str]) -> List[Dict]:
         if not steam_ids:
             return []
         
-        chunked_ids = [steam_ids[i:i + 100] for i in range(0, len(steam_ids), 100)]
-        all_players = []
+        # Target tuples are immutable, so the joined chunks can be reused while the same one is passed in
+        cached_ids, chunked_ids = self._chunk_cache
+        if steam_ids is not cached_ids:
+            chunked_ids = [",".join(steam_ids[i:i + 100]) for i in range(0, len(steam_ids), 100)]
+            if isinstance(steam_ids, tuple):
+                self._chunk_cache = (steam_ids, chunked_ids)
 
-        for chunk in chunked_ids:
-            try:
-                response = self.session.get(
-                    "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/",
-                    params={"key": self.api_key, "steamids": ",".join(chunk)},
-                    timeout=10
-                )
-                response.raise_for_status()
-                data = response.json()
-                all_players.extend(data.get("response", {}).get("players", []))
-            except Exception as e:
-                logging.error(f"Network error during fetch: {e}")
+        if len(chunked_ids) == 1:
+            return self._fetch_chunk(chunked_ids[0])
+
+        all_players = []
+        for players in self._pool.map(self._fetch_chunk, chunked_ids):
+            all_players.extend(players)
         
         return all_players
 
+    def _fetch_chunk(self, steamids: str) -> List[Dict]:
+        try:
+            response = self.session.get(
+                "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/",
+                params={"key": self.api_key, "steamids": steamids},
+                timeout=(3.05, 10)
+            )
+            response.raise_for_status()
+            data = orjson.loads(response.content) if orjson else response.json()
+            return data.get("response", {}).get("players", [])
+        except Exception as e:
+            logging.error(f"Network error during fetch: {e}")
+            return []
+
     def resolve_id(self, vanity_url: str) -> Optional[str]:
-        if vanity_url.isdigit() and len(vanity_url) == 17:
+        if _STEAM64.match(vanity_url) and int(vanity_url) >= _STEAM64_BASE:
             return vanity_url
         
         try:
@@ -113,7 +162,7 @@ class NetworkClient:
                 params={"key": self.api_key, "vanityurl": vanity_url},
                 timeout=5
             )
-            data = response.json()
+            data = orjson.loads(response.content) if orjson else response.json()
             if data.get("response", {}).get("success") == 1:
                 return data["response"]["steamid"]
         except Exception:
@@ -121,34 +170,91 @@ class NetworkClient:
         return None
 
 class NotificationService:
+    FOOTER = {"text": "System Monitor v3.0"}
+    MAX_EMBEDS = 10
+    BATCH_WINDOW = 0.5
+    QUEUE_SIZE = 256
+
     def __init__(self, webhook_url: Optional[str]):
         self.webhook_url = webhook_url
-        self._executor = ThreadPoolExecutor(max_workers=2)
+        self.session = requests.Session()
+        self.session.headers["Content-Type"] = "application/json"
+        self._queue: queue.Queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        if webhook_url:
+            self._thread = threading.Thread(target=self._worker, daemon=True)
+            self._thread.start()
 
-    def dispatch(self, title: str, desc: str, color: int, thumb: str = None, fields: List = None):
+    def dispatch(self, title: str, desc: str, color: int, thumb: str = None, fields: List = None, timestamp: str = None):
         if not self.webhook_url:
             return
-        self._executor.submit(self._send, title, desc, color, thumb, fields)
-
-    def _send(self, title, desc, color, thumb, fields):
-        payload = {
-            "embeds": [{
-                "title": title,
-                "description": desc,
-                "color": color,
-                "timestamp": datetime.utcnow().isoformat(),
-                "thumbnail": {"url": thumb} if thumb else {},
-                "footer": {"text": "System Monitor v3.0"}
-            }]
+        item = (title, desc, color, thumb, fields, timestamp)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Drop the oldest event rather than stall the monitor loop on a slow webhook
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            self._queue.put_nowait(item)
+
+    def _worker(self):
+        # Single consumer keeps webhook delivery in event order; None is the shutdown sentinel
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Events arriving within the window share one message (Discord allows 10 embeds)
+            deadline = time.monotonic() + self.BATCH_WINDOW
+            while len(batch) < self.MAX_EMBEDS:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            self._send([self._build_embed(*item) for item in batch])
+
+    def _build_embed(self, title, desc, color, thumb, fields, timestamp) -> Dict:
+        embed = {
+            "title": title,
+            "description": desc,
+            "color": color,
+            "timestamp": timestamp or datetime.now(timezone.utc).isoformat(),
+            "thumbnail": {"url": thumb} if thumb else {},
+            "footer": self.FOOTER
         }
         if fields:
-            payload["embeds"][0]["fields"] = fields
-        
+            embed["fields"] = fields
+        return embed
+
+    def _send(self, embeds: List[Dict]):
+        payload = {"embeds": embeds}
         try:
-            requests.post(self.webhook_url, json=payload, timeout=5)
+            if orjson:
+                self.session.post(self.webhook_url, data=orjson.dumps(payload), timeout=5)
+            else:
+                self.session.post(self.webhook_url, json=payload, timeout=5)
         except Exception as e:
             logging.warning(f"Failed to deliver notification: {e}")
 
+    def close(self, timeout: float = 5.0):
+        if self._thread:
+            try:
+                self._queue.put(None, timeout=timeout)
+                self._thread.join(timeout)
+            except queue.Full:
+                pass
+        self.session.close()
+
 class MonitorEngine:
     STATUS_MAP = {
         0: ("Offline", Colors.GRAY),
@@ -159,6 +265,13 @@ class MonitorEngine:
         5: ("Trading", Colors.CYAN),
         6: ("Playing", Colors.MAGENTA)
     }
+    # Persona states are contiguous from 0, so (label, colored label) pairs are indexed by code;
+    # building by code raises KeyError at import if STATUS_MAP ever gains a gap
+    STATUS_TABLE = tuple(
+        (label, f"{color}{label}{Colors.RESET}")
+        for label, color in map(STATUS_MAP.__getitem__, range(len(STATUS_MAP)))
+    )
+    UNKNOWN_STATUS = ("Unknown", f"{Colors.WHITE}Unknown{Colors.RESET}")
 
     def __init__(self):
         self._setup_logging()
@@ -166,7 +279,9 @@ class MonitorEngine:
         self.client = None
         self.notifier = None
         self.states: Dict[str, UserState] = {}
-        self.running = False
+        self._stop = threading.Event()
+        self._stopping = False
+        self._idle_cycles = 0
 
     def _setup_logging(self):
         logging.basicConfig(
@@ -186,11 +301,11 @@ class MonitorEngine:
             self.config.webhook_url = wb if wb else None
         
         if not self.config.target_users:
+            self.client = self.client or NetworkClient(self.config.api_key)
             while True:
                 uid = input("Add User (ID/URL) [Empty to finish]: ").strip()
                 if not uid:
                     break
-                self.client = NetworkClient(self.config.api_key)
                 resolved = self.client.resolve_id(uid.split('/')[-1] if '/' in uid else uid)
                 if resolved:
                     self.config.target_users.append(resolved)
@@ -199,17 +314,20 @@ class MonitorEngine:
                     logging.error("Invalid identifier")
         
         self.config.save()
-        self.client = NetworkClient(self.config.api_key)
-        self.notifier = NotificationService(self.config.webhook_url)
 
-    def _process_changes(self, user_data: Dict):
+    def _process_changes(self, user_data: Dict, timestamp: Optional[str] = None, now: Optional[float] = None) -> bool:
         sid = user_data["steamid"]
+        if now is None:
+            now = time.monotonic()
         current_state = self.states.get(sid)
         
         new_status_code = user_data.get("personastate", 0)
         new_game = user_data.get("gameextrainfo")
         
-        status_label, status_color = self.STATUS_MAP.get(new_status_code, ("Unknown", Colors.WHITE))
+        if isinstance(new_status_code, int) and 0 <= new_status_code < len(self.STATUS_TABLE):
+            status_label, status_str = self.STATUS_TABLE[new_status_code]
+        else:
+            status_label, status_str = self.UNKNOWN_STATUS
 
         if not current_state:
             self.states[sid] = UserState(
@@ -220,78 +338,118 @@ class MonitorEngine:
                 game=new_game
             )
             game_txt = f" | Playing: {new_game}" if new_game else ""
-            logging.info(f"{Colors.BOLD}{user_data['personaname']:<20}{Colors.RESET} initialized: {status_color}{status_label}{Colors.RESET}{game_txt}")
-            return
+            logging.info(f"{Colors.BOLD}{user_data['personaname']:<20}{Colors.RESET} initialized: {status_str}{game_txt}")
+            return True
+
+        changed = False
+        notify = bool(self.notifier.webhook_url)
 
         # Status Change
         if new_status_code != current_state.status:
-            logging.info(f"{Colors.BOLD}{current_state.personaname}{Colors.RESET} changed status: {status_color}{status_label}{Colors.RESET}")
-            self.notifier.dispatch(
-                "Status Update",
-                f"**{current_state.personaname}** is now **{status_label}**",
-                0x3498db,
-                current_state.avatar
-            )
+            logging.info(f"{Colors.BOLD}{current_state.personaname}{Colors.RESET} changed status: {status_str}")
+            if notify:
+                self.notifier.dispatch(
+                    "Status Update",
+                    f"**{current_state.personaname}** is now **{status_label}**",
+                    0x3498db,
+                    current_state.avatar,
+                    timestamp=timestamp
+                )
             current_state.status = new_status_code
+            changed = True
 
         # Game Activity
         if new_game != current_state.game:
             if new_game:
                 logging.info(f"{Colors.GREEN}>> {current_state.personaname} started: {new_game}{Colors.RESET}")
-                self.notifier.dispatch(
-                    "Activity Started",
-                    f"**{current_state.personaname}** is playing **{new_game}**",
-                    0x2ecc71,
-                    current_state.avatar
-                )
-                current_state.last_change = time.time()
+                if notify:
+                    self.notifier.dispatch(
+                        "Activity Started",
+                        f"**{current_state.personaname}** is playing **{new_game}**",
+                        0x2ecc71,
+                        current_state.avatar,
+                        timestamp=timestamp
+                    )
+                current_state.last_change = now
             else:
-                duration = int(time.time() - current_state.last_change)
+                duration = int(now - current_state.last_change)
                 hours, remainder = divmod(duration, 3600)
                 minutes, _ = divmod(remainder, 60)
                 time_str = f"{hours}h {minutes}m" if hours else f"{minutes}m"
                 
                 logging.info(f"{Colors.YELLOW}<< {current_state.personaname} closed: {current_state.game} ({time_str}){Colors.RESET}")
-                self.notifier.dispatch(
-                    "Activity Ended",
-                    f"**{current_state.personaname}** finished **{current_state.game}**",
-                    0xe74c3c,
-                    current_state.avatar,
-                    [{"name": "Duration", "value": time_str}]
-                )
+                if notify:
+                    self.notifier.dispatch(
+                        "Activity Ended",
+                        f"**{current_state.personaname}** finished **{current_state.game}**",
+                        0xe74c3c,
+                        current_state.avatar,
+                        [{"name": "Duration", "value": time_str}],
+                        timestamp=timestamp
+                    )
             
             current_state.game = new_game
+            changed = True
+
+        return changed
+
+    def _next_interval(self, changed: bool) -> int:
+        # Back off up to max_interval while nothing happens; stay at the base rate while anyone is in-game
+        base = self.config.interval
+        cap = max(self.config.max_interval or base, base)
+        if changed or any(state.game for state in self.states.values()):
+            self._idle_cycles = 0
+        elif base * (2 ** self._idle_cycles) < cap:
+            self._idle_cycles += 1
+        return min(base * (2 ** self._idle_cycles), cap)
 
     def run(self):
         if not self.config.validate():
+            if not sys.stdin.isatty():
+                logging.error(f"Configuration incomplete and no terminal for setup. Edit {self.config.FILE_PATH} and restart.")
+                sys.exit(1)
             self.setup_wizard()
 
-        self.client = NetworkClient(self.config.api_key)
+        self.client = self.client or NetworkClient(self.config.api_key)
         self.notifier = NotificationService(self.config.webhook_url)
-        self.running = True
+        self._stop.clear()
+        self._stopping = False
 
         signal.signal(signal.SIGINT, self._shutdown)
         signal.signal(signal.SIGTERM, self._shutdown)
 
-        logging.info(f"Engine started. Monitoring {len(self.config.target_users)} targets.")
+        # Frozen once so NetworkClient can reuse its joined id chunks every cycle
+        targets = tuple(self.config.target_users)
+        logging.info(f"Engine started. Monitoring {len(targets)} targets.")
         
-        while self.running:
-            start_time = time.time()
-            try:
-                users = self.client.get_summaries(self.config.target_users)
-                for user in users:
-                    self._process_changes(user)
-            except Exception as e:
-                logging.error(f"Cycle error: {e}")
+        try:
+            while not self._stop.is_set():
+                start_time = time.time()
+                changed = False
+                try:
+                    users = self.client.get_summaries(targets)
+                    now = time.monotonic()
+                    cycle_ts = datetime.now(timezone.utc).isoformat()
+                    for user in users:
+                        if self._process_changes(user, cycle_ts, now):
+                            changed = True
+                except Exception as e:
+                    logging.error(f"Cycle error: {e}")
             
-            elapsed = time.time() - start_time
-            sleep_time = max(0, self.config.interval - elapsed)
-            time.sleep(sleep_time)
+                elapsed = time.time() - start_time
+                sleep_time = max(0, self._next_interval(changed) - elapsed)
+                if self._stop.wait(sleep_time):
+                    break
+        finally:
+            self.notifier.close()
 
     def _shutdown(self, signum, frame):
+        if self._stopping:
+            sys.exit(1)
+        self._stopping = True
         logging.info("Shutdown signal received. Terminating...")
-        self.running = False
-        sys.exit(0)
+        # Event.set() takes a non-reentrant lock the interrupted main thread may hold
+        threading.Thread(target=self._stop.set, daemon=True).start()
 
 if __name__ == "__main__":
     MonitorEngine().run()